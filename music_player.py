@@ -0,0 +1,934 @@
+"""
+Simple PyQt5 music player with playlist support.
+
+Playback is handled by Qt Multimedia's QMediaPlayer; tags are read with
+mutagen.
+Playlists persist to playlists.json next to this script, and a per-file
+metadata cache (keyed by path and validated against mtime/size) persists
+to a sibling metadata.json so playlist switches and startup do not have
+to re-open every track with mutagen.
+"""
+
+import json
+import logging
+import os
+import struct
+import sys
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+    import zstandard
+except ImportError:
+    msgpack = None
+    zstandard = None
+
+from mutagen import File as MutagenFile
+from mutagen.mp3 import MP3
+from mutagen.wave import WAVE
+from PyQt5.QtCore import QObject, QRunnable, Qt, QThreadPool, QTimer, QUrl, pyqtSignal
+from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer
+from PyQt5.QtWidgets import (
+    QApplication,
+    QFileDialog,
+    QHBoxLayout,
+    QInputDialog,
+    QLabel,
+    QListView,
+    QListWidget,
+    QListWidgetItem,
+    QMainWindow,
+    QMessageBox,
+    QPushButton,
+    QSlider,
+    QVBoxLayout,
+    QWidget,
+)
+
+
+# Single source of truth for what the player treats as audio: the file
+# dialog filter and the add-time validation both derive from this set.
+AUDIO_EXTS = frozenset({".mp3", ".wav", ".ogg", ".m4a", ".flac", ".opus"})
+AUDIO_FILTER = (
+    "Audio Files ("
+    + " ".join(f"*{ext}" for ext in sorted(AUDIO_EXTS))
+    + ");;All Files (*)"
+)
+
+
+log = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def _format_time(seconds: int) -> str:
+    """Render whole seconds as m:ss; cached since values repeat heavily."""
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+# Layer III bitrate (kbps) and sample-rate tables, keyed by MPEG version.
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {
+    "1": (44100, 48000, 32000),
+    "2": (22050, 24000, 16000),
+    "2.5": (11025, 12000, 8000),
+}
+
+
+class AudioPlayer:
+    """Thin wrapper around Qt Multimedia's QMediaPlayer.
+
+    Fully event-driven: positionChanged/durationChanged fire on their
+    own, so there is no polling timer, and audio scheduling is handled
+    by the platform's native API. The Qt signals are exposed as
+    attributes so the window can connect to them directly.
+    """
+
+    def __init__(self):
+        self._mp = QMediaPlayer()
+        self._mp.setVolume(70)
+        self.current_song = None
+        self.positionChanged = self._mp.positionChanged
+        self.durationChanged = self._mp.durationChanged
+        self.mediaStatusChanged = self._mp.mediaStatusChanged
+
+    @property
+    def is_playing(self):
+        return self._mp.state() == QMediaPlayer.PlayingState
+
+    @property
+    def is_paused(self):
+        return self._mp.state() == QMediaPlayer.PausedState
+
+    def load_song(self, song_path):
+        """Load a song for playback. Returns True on success."""
+        try:
+            self._mp.setMedia(QMediaContent(QUrl.fromLocalFile(song_path)))
+            self.current_song = song_path
+            return True
+        except Exception as e:
+            log.warning("Error loading song: %s", e)
+            return False
+
+    def play(self):
+        if self.current_song is None:
+            return
+        self._mp.play()
+
+    def pause(self):
+        if self.is_playing:
+            self._mp.pause()
+
+    def stop(self):
+        self._mp.stop()
+
+    def set_volume(self, volume):
+        """Set playback volume (0.0 - 1.0)."""
+        self._mp.setVolume(int(volume * 100))
+
+    def get_position(self):
+        """Return the playback position in milliseconds."""
+        return self._mp.position()
+
+    def set_position(self, position_ms):
+        """Seek to the given position in milliseconds."""
+        self._mp.setPosition(int(position_ms))
+
+    def quit(self):
+        """Drop the current media so the backend releases the device."""
+        self._mp.stop()
+        self._mp.setMedia(QMediaContent())
+
+    @staticmethod
+    def _fast_mp3_duration(song_path):
+        """Compute an MP3's duration from its headers alone.
+
+        Skips the ID3v2 tag via its synchsafe size field, locates the
+        first MPEG frame header, and reads the Xing/Info frame count if
+        present (exact for VBR); otherwise estimates from the frame
+        bitrate and the audio byte count (exact for CBR). Reads ~4KB
+        instead of the whole tag block. Returns seconds, or None if the
+        headers don't parse — callers fall back to mutagen.
+        """
+        try:
+            with open(song_path, "rb") as f:
+                header = f.read(10)
+                offset = 0
+                if header[:3] == b"ID3":
+                    offset = 10 + (
+                        (header[6] & 0x7F) << 21
+                        | (header[7] & 0x7F) << 14
+                        | (header[8] & 0x7F) << 7
+                        | (header[9] & 0x7F)
+                    )
+                f.seek(offset)
+                chunk = f.read(4096)
+            sync = -1
+            for i in range(len(chunk) - 4):
+                if chunk[i] == 0xFF and chunk[i + 1] & 0xE0 == 0xE0:
+                    sync = i
+                    break
+            if sync < 0:
+                return None
+            version_bits = (chunk[sync + 1] >> 3) & 0x3
+            layer_bits = (chunk[sync + 1] >> 1) & 0x3
+            if version_bits == 1 or layer_bits != 1:  # reserved / not Layer III
+                return None
+            bitrate_idx = (chunk[sync + 2] >> 4) & 0xF
+            sr_idx = (chunk[sync + 2] >> 2) & 0x3
+            if bitrate_idx in (0, 15) or sr_idx == 3:
+                return None
+            mono = ((chunk[sync + 3] >> 6) & 0x3) == 3
+            if version_bits == 3:  # MPEG 1
+                bitrate = _MP3_BITRATES[1][bitrate_idx] * 1000
+                sample_rate = _MP3_SAMPLE_RATES["1"][sr_idx]
+                samples_per_frame = 1152
+                xing_at = sync + (21 if mono else 36)
+            else:  # MPEG 2 / 2.5
+                bitrate = _MP3_BITRATES[2][bitrate_idx] * 1000
+                version = "2" if version_bits == 2 else "2.5"
+                sample_rate = _MP3_SAMPLE_RATES[version][sr_idx]
+                samples_per_frame = 576
+                xing_at = sync + (13 if mono else 21)
+            if chunk[xing_at:xing_at + 4] in (b"Xing", b"Info"):
+                flags, = struct.unpack(">I", chunk[xing_at + 4:xing_at + 8])
+                if flags & 0x1:
+                    frames, = struct.unpack(">I", chunk[xing_at + 8:xing_at + 12])
+                    return frames * samples_per_frame / sample_rate
+            return (os.path.getsize(song_path) - offset) * 8 / bitrate
+        except (OSError, struct.error, IndexError):
+            return None
+
+    def get_song_duration(self, song_path):
+        """Return the song length in seconds, or 0 if it cannot be read.
+
+        Dispatches on extension so the common formats go through their
+        concrete mutagen class, which reads stream info without decoding
+        every tag frame the way format sniffing does. MP3s try the
+        header-only fast path first.
+        """
+        try:
+            ext = Path(song_path).suffix.lower()
+            if ext == ".mp3":
+                duration = self._fast_mp3_duration(song_path)
+                if duration is not None:
+                    return duration
+                return MP3(song_path).info.length
+            if ext == ".wav":
+                return WAVE(song_path).info.length
+            audio = MutagenFile(song_path)
+            if audio is not None and audio.info is not None:
+                return audio.info.length
+        except Exception as e:
+            log.warning("Error reading duration: %s", e)
+        return 0
+
+    def get_song_info(self, song_path):
+        """Return {'title': ..., 'artist': ...} read from the file's tags.
+
+        Uses mutagen's EasyID3-style view, which skips instantiating
+        heavyweight frames such as embedded cover art.
+        """
+        title = Path(song_path).stem
+        artist = "Unknown Artist"
+        try:
+            audio = MutagenFile(song_path, easy=True)
+            if audio is not None and audio.tags is not None:
+                title = str(audio.tags.get("title", [title])[0])
+                artist = str(audio.tags.get("artist", [artist])[0])
+        except Exception as e:
+            log.warning("Error reading tags: %s", e)
+        return {"title": title, "artist": artist}
+
+
+def _load_json(path):
+    """Parse a JSON file, preferring orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dump_json(path, data):
+    """Serialize data to path in one write, preferring orjson."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+
+class MetadataSignals(QObject):
+    """Signal holder for MetadataWorker (QRunnable can't emit directly)."""
+
+    result = pyqtSignal(int, int, dict)
+
+
+class MetadataWorker(QRunnable):
+    """Reads tags and duration for a chunk of songs off the GUI thread.
+
+    Emits (scan_generation, row, metadata) per song so the window can
+    discard results that belong to a superseded playlist selection.
+    """
+
+    def __init__(self, audio_player, generation, jobs, signals):
+        super().__init__()
+        self.audio_player = audio_player
+        self.generation = generation
+        self.jobs = jobs  # list of (row, song_path, mtime, size)
+        self.signals = signals
+
+    def run(self):
+        for row, song_path, mtime, size in self.jobs:
+            info = self.audio_player.get_song_info(song_path)
+            metadata = {
+                "mtime": mtime,
+                "size": size,
+                "title": info["title"],
+                "artist": info["artist"],
+                "duration": self.audio_player.get_song_duration(song_path),
+            }
+            self.signals.result.emit(self.generation, row, metadata)
+
+
+class PlaylistManager:
+    """Loads, saves and edits the named playlists stored in playlists.json.
+
+    Also owns the persistent metadata cache: one entry per song path,
+    holding the stat signature (mtime, size) it was read under plus the
+    title/artist/duration extracted by mutagen. Entries whose signature
+    no longer matches the file on disk are treated as misses. The cache
+    is an LRU bounded at METADATA_CACHE_MAX entries, loaded lazily on
+    first lookup and written back once at shutdown — as a zstd-compressed
+    msgpack blob when those libraries are installed, plain JSON otherwise.
+    """
+
+    METADATA_CACHE_MAX = 20000
+
+    def __init__(self):
+        self.playlists_file = Path(__file__).with_name("playlists.json")
+        if msgpack is not None and zstandard is not None:
+            self.metadata_file = Path(__file__).with_name("metadata.msgpack.zst")
+        else:
+            self.metadata_file = Path(__file__).with_name("metadata.json")
+        self.playlists: Dict[str, list] = {}
+        self.metadata_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._metadata_loaded = False
+        self._dirty = False
+        self._save_timer = QTimer()
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(500)
+        self._save_timer.timeout.connect(self.flush)
+        self.load_playlists()
+
+    def load_playlists(self):
+        if self.playlists_file.exists():
+            try:
+                self.playlists = _load_json(self.playlists_file)
+            except (ValueError, OSError) as e:
+                log.warning("Error loading playlists: %s", e)
+                self.playlists = {}
+        if not self.playlists:
+            self.playlists = {"Default": []}
+        # Parallel path sets so membership checks are O(1) instead of
+        # scanning the (ordered) song lists.
+        # Keys starting with "_" are bookkeeping (e.g. "_last", the
+        # playlist that was selected when the app last ran), not playlists.
+        self._sets = {
+            name: set(paths)
+            for name, paths in self.playlists.items()
+            if not name.startswith("_")
+        }
+
+    def _ensure_metadata_loaded(self):
+        """Deserialize the metadata cache on first access, not at startup."""
+        if self._metadata_loaded:
+            return
+        self._metadata_loaded = True
+        if not self.metadata_file.exists():
+            return
+        try:
+            if self.metadata_file.suffix == ".zst":
+                raw = zstandard.ZstdDecompressor().decompress(
+                    self.metadata_file.read_bytes()
+                )
+                self.metadata_cache = OrderedDict(msgpack.unpackb(raw))
+            else:
+                self.metadata_cache = OrderedDict(_load_json(self.metadata_file))
+        except Exception as e:
+            log.warning("Error loading metadata cache: %s", e)
+            self.metadata_cache = OrderedDict()
+
+    def save_metadata(self):
+        """Write the metadata cache to disk; called once at shutdown."""
+        if not self._metadata_loaded:
+            return
+        try:
+            if self.metadata_file.suffix == ".zst":
+                raw = msgpack.packb(dict(self.metadata_cache))
+                self.metadata_file.write_bytes(
+                    zstandard.ZstdCompressor().compress(raw)
+                )
+            else:
+                _dump_json(self.metadata_file, dict(self.metadata_cache))
+        except OSError as e:
+            log.warning("Error saving metadata cache: %s", e)
+
+    def save_playlists(self):
+        """Mark state dirty and schedule a write 500ms out.
+
+        Restarting the single-shot timer coalesces bursts of mutations
+        (bulk adds, worker cache updates) into one disk write.
+        """
+        self._dirty = True
+        self._save_timer.start()
+
+    def flush(self):
+        """Write any pending changes to disk immediately."""
+        self._save_timer.stop()
+        if self._dirty:
+            self._dirty = False
+            self._save_now()
+
+    def _save_now(self):
+        try:
+            _dump_json(self.playlists_file, self.playlists)
+        except OSError as e:
+            log.warning("Error saving playlists: %s", e)
+
+    def get_cached_metadata(self, song_path, mtime, size):
+        """Return the cached metadata dict for song_path, or None on miss.
+
+        A cached entry only counts as a hit if the file's current mtime
+        and size match the ones recorded when the entry was written.
+        Hits are refreshed in the LRU ordering.
+        """
+        self._ensure_metadata_loaded()
+        entry = self.metadata_cache.get(song_path)
+        if entry is None:
+            return None
+        if entry.get("mtime") != mtime or entry.get("size") != size:
+            del self.metadata_cache[song_path]
+            return None
+        self.metadata_cache.move_to_end(song_path)
+        return entry
+
+    def store_metadata(self, song_path, mtime, size, title, artist, duration):
+        self._ensure_metadata_loaded()
+        self.metadata_cache[song_path] = {
+            "mtime": mtime,
+            "size": size,
+            "title": title,
+            "artist": artist,
+            "duration": duration,
+        }
+        self.metadata_cache.move_to_end(song_path)
+        while len(self.metadata_cache) > self.METADATA_CACHE_MAX:
+            self.metadata_cache.popitem(last=False)
+
+    def get_last_playlist(self):
+        """Return the playlist selected when the app last ran."""
+        name = self.playlists.get("_last", "Default")
+        return name if name in self._sets else "Default"
+
+    def set_last_playlist(self, name):
+        if self.playlists.get("_last") != name:
+            self.playlists["_last"] = name
+            self.save_playlists()
+
+    def create_playlist(self, name):
+        if name and not name.startswith("_") and name not in self.playlists:
+            self.playlists[name] = []
+            self._sets[name] = set()
+            self.save_playlists()
+            return True
+        return False
+
+    def delete_playlist(self, name):
+        if name in self.playlists and name != "Default":
+            del self.playlists[name]
+            del self._sets[name]
+            self.save_playlists()
+            return True
+        return False
+
+    def add_song_to_playlist(self, playlist_name, song_path, save=True):
+        if playlist_name in self.playlists:
+            if song_path not in self._sets[playlist_name]:
+                self.playlists[playlist_name].append(song_path)
+                self._sets[playlist_name].add(song_path)
+                if save:
+                    self.save_playlists()
+                return True
+        return False
+
+    def remove_song_from_playlist(self, playlist_name, song_path, save=True):
+        if playlist_name in self.playlists:
+            if song_path in self._sets[playlist_name]:
+                self.playlists[playlist_name].remove(song_path)
+                self._sets[playlist_name].discard(song_path)
+                if save:
+                    self.save_playlists()
+                return True
+        return False
+
+    def get_playlist_songs(self, playlist_name):
+        return self.playlists.get(playlist_name, [])
+
+    def get_playlist_names(self):
+        return [name for name in self.playlists if not name.startswith("_")]
+
+
+class MusicPlayerWindow(QMainWindow):
+    """Main window: playlist panel on the left, controls at the bottom."""
+
+    def __init__(self):
+        super().__init__()
+        self.audio_player = AudioPlayer()
+        self.playlist_manager = PlaylistManager()
+        self.current_playlist = self.playlist_manager.get_last_playlist()
+        self.current_song_index = -1
+        self._last_shown_sec = -1
+
+        self._scan_generation = 0
+        self._row_by_path: Dict[str, QListWidgetItem] = {}
+        self._metadata_pool = QThreadPool.globalInstance()
+        self._metadata_pool.setMaxThreadCount(min(4, os.cpu_count() or 1))
+        self._metadata_signals = MetadataSignals()
+        self._metadata_signals.result.connect(self.on_metadata_ready)
+
+        self.init_ui()
+
+        self.audio_player.positionChanged.connect(self.on_position_changed)
+        self.audio_player.durationChanged.connect(self.on_duration_changed)
+        self.audio_player.mediaStatusChanged.connect(self.on_media_status_changed)
+        # The first playlist scan is scheduled from main() after show()
+        # so the window paints before any metadata work starts.
+
+    def init_ui(self):
+        self.setWindowTitle("Music Player")
+        self.setGeometry(200, 200, 800, 500)
+
+        central = QWidget()
+        self.setCentralWidget(central)
+        layout = QVBoxLayout(central)
+
+        body = QHBoxLayout()
+        body.addWidget(self.create_playlist_panel(), 1)
+        body.addWidget(self.create_songs_panel(), 2)
+        layout.addLayout(body)
+
+        layout.addWidget(self.create_controls_panel())
+
+    def create_playlist_panel(self):
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+
+        layout.addWidget(QLabel("Playlists"))
+        self.playlists_list = QListWidget()
+        self.playlists_list.currentTextChanged.connect(self.on_playlist_selected)
+        layout.addWidget(self.playlists_list)
+
+        buttons = QHBoxLayout()
+        new_btn = QPushButton("New")
+        new_btn.clicked.connect(self.create_playlist)
+        delete_btn = QPushButton("Delete")
+        delete_btn.clicked.connect(self.delete_playlist)
+        buttons.addWidget(new_btn)
+        buttons.addWidget(delete_btn)
+        layout.addLayout(buttons)
+
+        return panel
+
+    def create_songs_panel(self):
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+
+        layout.addWidget(QLabel("Songs"))
+        self.songs_list = QListWidget()
+        # Every row is one line of text, so let Qt measure a single item
+        # instead of size-hinting all N, and lay out rows in batches so
+        # huge playlists don't block the first paint.
+        self.songs_list.setUniformItemSizes(True)
+        self.songs_list.setLayoutMode(QListView.Batched)
+        self.songs_list.setBatchSize(256)
+        self.songs_list.itemDoubleClicked.connect(self.on_song_double_clicked)
+        layout.addWidget(self.songs_list)
+
+        buttons = QHBoxLayout()
+        add_btn = QPushButton("Add Songs")
+        add_btn.clicked.connect(self.add_songs_to_playlist)
+        add_folder_btn = QPushButton("Add Folder")
+        add_folder_btn.clicked.connect(self.add_folder_to_playlist)
+        remove_btn = QPushButton("Remove")
+        remove_btn.clicked.connect(self.remove_selected_song)
+        buttons.addWidget(add_btn)
+        buttons.addWidget(add_folder_btn)
+        buttons.addWidget(remove_btn)
+        layout.addLayout(buttons)
+
+        return panel
+
+    def create_controls_panel(self):
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+
+        self.now_playing_label = QLabel("No song playing")
+        self.now_playing_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.now_playing_label)
+
+        progress_row = QHBoxLayout()
+        self.time_label = QLabel("0:00")
+        self.progress_bar = QSlider(Qt.Horizontal)
+        self.progress_bar.sliderPressed.connect(self.on_seek_start)
+        self.progress_bar.sliderReleased.connect(self.on_seek_end)
+        self.duration_label = QLabel("0:00")
+        progress_row.addWidget(self.time_label)
+        progress_row.addWidget(self.progress_bar)
+        progress_row.addWidget(self.duration_label)
+        layout.addLayout(progress_row)
+
+        buttons = QHBoxLayout()
+        prev_btn = QPushButton("Prev")
+        prev_btn.clicked.connect(self.previous_song)
+        self.play_btn = QPushButton("Play")
+        self.play_btn.clicked.connect(self.toggle_play)
+        stop_btn = QPushButton("Stop")
+        stop_btn.clicked.connect(self.stop_song)
+        next_btn = QPushButton("Next")
+        next_btn.clicked.connect(self.next_song)
+        buttons.addWidget(prev_btn)
+        buttons.addWidget(self.play_btn)
+        buttons.addWidget(stop_btn)
+        buttons.addWidget(next_btn)
+
+        buttons.addWidget(QLabel("Volume"))
+        self.volume_slider = QSlider(Qt.Horizontal)
+        self.volume_slider.setRange(0, 100)
+        self.volume_slider.setValue(70)
+        self.volume_slider.setMaximumWidth(120)
+        self.volume_slider.valueChanged.connect(self.on_volume_changed)
+        buttons.addWidget(self.volume_slider)
+        layout.addLayout(buttons)
+
+        return panel
+
+
+    def load_current_playlist(self):
+        self.playlists_list.clear()
+        for name in self.playlist_manager.get_playlist_names():
+            self.playlists_list.addItem(name)
+        items = self.playlists_list.findItems(self.current_playlist, Qt.MatchExactly)
+        if items:
+            self.playlists_list.setCurrentItem(items[0])
+        self.update_songs_list()
+
+    def on_playlist_selected(self, name):
+        if name and name != self.current_playlist:
+            self.current_playlist = name
+            self.playlist_manager.set_last_playlist(name)
+            self.update_songs_list()
+
+    def update_songs_list(self):
+        """Repopulate the songs list for the current playlist.
+
+        Metadata comes from the persistent cache when the file's stat
+        signature matches; cache misses get a placeholder row immediately
+        and are resolved by MetadataWorker runnables off the GUI thread.
+        Rows are diffed against the widget's current contents rather than
+        cleared, so switching between playlists only touches the rows
+        that actually differ.
+        """
+        self._scan_generation += 1
+        generation = self._scan_generation
+
+        # (song_path, stat) in playlist order, for files that still exist.
+        # One stat per song serves as both the existence check and the
+        # cache-signature lookup.
+        target = []
+        for song_path in self.playlist_manager.get_playlist_songs(self.current_playlist):
+            try:
+                target.append((song_path, os.stat(song_path)))
+            except OSError:
+                continue
+        target_paths = {song_path for song_path, _ in target}
+
+        jobs = []
+        self.songs_list.setUpdatesEnabled(False)
+        try:
+            for row in range(self.songs_list.count() - 1, -1, -1):
+                path = self.songs_list.item(row).data(Qt.UserRole)
+                if path not in target_paths:
+                    self._row_by_path.pop(path, None)
+                    self.songs_list.takeItem(row)
+
+            for row, (song_path, st) in enumerate(target):
+                cached = self.playlist_manager.get_cached_metadata(
+                    song_path, st.st_mtime, st.st_size
+                )
+                if cached is not None:
+                    text = self.format_song_row(cached)
+                else:
+                    text = f"{Path(song_path).stem} ..."
+                    jobs.append((row, song_path, st.st_mtime, st.st_size))
+                item = self._row_by_path.get(song_path)
+                if item is None:
+                    item = QListWidgetItem(text)
+                    item.setData(Qt.UserRole, song_path)
+                    self._row_by_path[song_path] = item
+                    self.songs_list.insertItem(row, item)
+                else:
+                    current = self.songs_list.row(item)
+                    if current != row:
+                        self.songs_list.insertItem(
+                            row, self.songs_list.takeItem(current)
+                        )
+                    if item.text() != text:
+                        item.setText(text)
+        finally:
+            self.songs_list.setUpdatesEnabled(True)
+
+        for start in range(0, len(jobs), 32):
+            worker = MetadataWorker(
+                self.audio_player,
+                generation,
+                jobs[start:start + 32],
+                self._metadata_signals,
+            )
+            self._metadata_pool.start(worker)
+
+    def on_metadata_ready(self, generation, row, metadata):
+        """Fill in a placeholder row with metadata read by a worker."""
+        if generation != self._scan_generation:
+            return
+        item = self.songs_list.item(row)
+        if item is not None:
+            item.setText(self.format_song_row(metadata))
+            self.playlist_manager.store_metadata(
+                item.data(Qt.UserRole),
+                metadata["mtime"],
+                metadata["size"],
+                metadata["title"],
+                metadata["artist"],
+                metadata["duration"],
+            )
+
+    def format_song_row(self, metadata):
+        return (
+            f"{metadata['title']} - {metadata['artist']} "
+            f"({self.format_time(metadata['duration'])})"
+        )
+
+    def create_playlist(self):
+        name, ok = QInputDialog.getText(self, "New Playlist", "Playlist name:")
+        if ok and name:
+            if self.playlist_manager.create_playlist(name):
+                self.current_playlist = name
+                self.load_current_playlist()
+            else:
+                QMessageBox.warning(self, "Error", "Playlist already exists.")
+
+    def delete_playlist(self):
+        item = self.playlists_list.currentItem()
+        if item is None:
+            return
+        if self.playlist_manager.delete_playlist(item.text()):
+            self.current_playlist = "Default"
+            self.load_current_playlist()
+
+    @staticmethod
+    def _is_valid_audio_file(suffix, size):
+        """Cheap pre-filter so mutagen never opens obvious non-songs.
+
+        Rejects unknown extensions, truncated files (<100 bytes can't
+        hold a valid header) and implausibly large ones (>2GB).
+        """
+        if suffix not in AUDIO_EXTS:
+            return False
+        return 100 <= size <= 2 * 1024 ** 3
+
+    def _add_songs(self, file_paths):
+        """Validate and add a batch of files, saving at most once."""
+        added = False
+        for path in file_paths:
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            if not self._is_valid_audio_file(Path(path).suffix.lower(), size):
+                continue
+            if self.playlist_manager.add_song_to_playlist(
+                self.current_playlist, path, save=False
+            ):
+                added = True
+        if added:
+            self.playlist_manager.save_playlists()
+            self.update_songs_list()
+
+    def add_songs_to_playlist(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Add Songs", "", AUDIO_FILTER
+        )
+        self._add_songs(file_paths)
+
+    def add_folder_to_playlist(self):
+        """Add every audio file in a chosen folder in one scandir pass."""
+        folder = QFileDialog.getExistingDirectory(self, "Add Folder")
+        if not folder:
+            return
+        added = False
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    if not self._is_valid_audio_file(
+                        Path(entry.name).suffix.lower(),
+                        entry.stat(follow_symlinks=False).st_size,
+                    ):
+                        continue
+                    if self.playlist_manager.add_song_to_playlist(
+                        self.current_playlist, entry.path, save=False
+                    ):
+                        added = True
+        except OSError as e:
+            log.warning("Error scanning folder: %s", e)
+        if added:
+            self.playlist_manager.save_playlists()
+            self.update_songs_list()
+
+    def remove_selected_song(self):
+        item = self.songs_list.currentItem()
+        if item is None:
+            return
+        song_path = item.data(Qt.UserRole)
+        self.playlist_manager.remove_song_from_playlist(self.current_playlist, song_path)
+        self.update_songs_list()
+
+    def on_song_double_clicked(self, item):
+        self.current_song_index = self.songs_list.row(item)
+        self.play_current_song()
+
+    def play_current_song(self):
+        songs = self.playlist_manager.get_playlist_songs(self.current_playlist)
+        if not songs or not 0 <= self.current_song_index < len(songs):
+            return
+        song_path = songs[self.current_song_index]
+        if not self.audio_player.load_song(song_path):
+            return
+        self.audio_player.play()
+        self.play_btn.setText("Pause")
+        self._last_shown_sec = -1
+
+        info = self.audio_player.get_song_info(song_path)
+        self.now_playing_label.setText(f"{info['title']} - {info['artist']}")
+
+        # current_song_index is kept in step with the widget rows by
+        # on_song_double_clicked and next_song/previous_song, so no scan
+        # for the matching row is needed.
+        self.songs_list.setCurrentRow(self.current_song_index)
+
+    def toggle_play(self):
+        if self.audio_player.is_playing and not self.audio_player.is_paused:
+            self.audio_player.pause()
+            self.play_btn.setText("Play")
+        elif self.audio_player.is_paused:
+            self.audio_player.play()
+            self.play_btn.setText("Pause")
+        elif self.current_song_index >= 0:
+            self.play_current_song()
+        else:
+            self.current_song_index = 0
+            self.play_current_song()
+
+    def stop_song(self):
+        self.audio_player.stop()
+        self.play_btn.setText("Play")
+        self._last_shown_sec = 0
+        self.progress_bar.setValue(0)
+        self.time_label.setText("0:00")
+
+    def next_song(self):
+        songs = self.playlist_manager.get_playlist_songs(self.current_playlist)
+        if songs:
+            self.current_song_index = (self.current_song_index + 1) % len(songs)
+            self.play_current_song()
+
+    def previous_song(self):
+        songs = self.playlist_manager.get_playlist_songs(self.current_playlist)
+        if songs:
+            self.current_song_index = (self.current_song_index - 1) % len(songs)
+            self.play_current_song()
+
+    def on_volume_changed(self, value):
+        self.audio_player.set_volume(value / 100)
+
+    def on_seek_start(self):
+        # While the slider is held, update_progress leaves it alone
+        # (see the isSliderDown check there).
+        pass
+
+    def on_seek_end(self):
+        self.audio_player.set_position(self.progress_bar.value() * 1000)
+
+    def on_position_changed(self, position_ms):
+        if self.progress_bar.isSliderDown():
+            return
+        # Only touch the widgets when the displayed second actually
+        # changes; setValue/setText trigger repaints even for equal
+        # values.
+        seconds = int(position_ms // 1000)
+        if seconds != self._last_shown_sec:
+            self._last_shown_sec = seconds
+            self.progress_bar.setValue(seconds)
+            self.time_label.setText(_format_time(seconds))
+
+    def on_duration_changed(self, duration_ms):
+        seconds = int(duration_ms // 1000)
+        self.progress_bar.setRange(0, seconds)
+        self.duration_label.setText(_format_time(seconds))
+
+    def on_media_status_changed(self, status):
+        if status == QMediaPlayer.EndOfMedia:
+            self.next_song()
+
+    def format_time(self, seconds):
+        return _format_time(int(seconds))
+
+    def closeEvent(self, event):
+        self.playlist_manager.flush()
+        self.playlist_manager.save_metadata()
+        self.audio_player.stop()
+        self.audio_player.quit()
+        event.accept()
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    app = QApplication(sys.argv)
+    # Set once at application scope so every window inherits it; Qt only
+    # parses the stylesheet a single time this way.
+    try:
+        app.setStyleSheet(Path(__file__).with_name("style.qss").read_text())
+    except OSError as e:
+        log.warning("Error loading stylesheet: %s", e)
+    window = MusicPlayerWindow()
+    window.show()
+    # Defer the first playlist scan until the event loop is running so
+    # the window paints before any file I/O happens.
+    QTimer.singleShot(0, window.load_current_playlist)
+    sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    main()